@@ -22,7 +22,7 @@ def hook(hook_api):
     Freeze all external Tcl/Tk data files if this is a supported platform *or* log a non-fatal error otherwise.
     """
     if compat.is_win or compat.is_darwin or compat.is_unix:
-        # collect_tcl_tk_files() returns a Tree, so we need to store it into `hook_api.datas` in order to prevent
+        # collect_tcl_tk_files() returns a TOC, so we need to store it into `hook_api.datas` in order to prevent
         # `building.imphook.format_binaries_and_datas` from crashing with "too many values to unpack".
         hook_api.add_datas(collect_tcl_tk_files(hook_api.__file__))
     else:
@@ -9,20 +9,36 @@
 # SPDX-License-Identifier: (GPL-2.0-or-later WITH Bootloader-exception)
 #-----------------------------------------------------------------------------
 
+import concurrent.futures
+import functools
+import hashlib
 import locale
 import os
+import re
+import sys
 
 from PyInstaller import compat
 from PyInstaller import log as logging
-from PyInstaller.building.datastruct import Tree
+from PyInstaller.building.datastruct import TOC, unique_name
+from PyInstaller.config import CONF
 from PyInstaller.depend import bindepend
 from PyInstaller.utils import hooks as hookutils
+from PyInstaller.utils import misc
+
+if compat.is_darwin:
+    import macholib.util
 
 logger = logging.getLogger(__name__)
 
 TK_ROOTNAME = 'tk'
 TCL_ROOTNAME = 'tcl'
 
+# Path suffix of the "init.tcl" script; includes the separator so that e.g. "myinit.tcl" is not matched.
+_INIT_SUFFIX = os.sep + 'init.tcl'
+
+# Matches commented lines in Tcl scripts.
+_COMMENT_RE = re.compile(r'(?m)^[ \t]*#.*')
+
 
 def _warn_if_activetcl_or_teapot_installed(tcl_root, tcltree):
     """
@@ -36,34 +52,25 @@ def _warn_if_activetcl_or_teapot_installed(tcl_root, tcltree):
     -------
     https://github.com/pyinstaller/pyinstaller/issues/621
     """
-    import macholib.util
-
     # System libraries do not experience this problem.
     if macholib.util.in_system_path(tcl_root):
         return
 
     # Absolute path of the "init.tcl" script.
-    try:
-        init_resource = [r[1] for r in tcltree if r[1].endswith('init.tcl')][0]
-    except IndexError:
+    init_resource = next((r[1] for r in tcltree if r[1].endswith(_INIT_SUFFIX)), None)
+    if init_resource is None:
         # If such script could not be found, silently return.
         return
 
-    mentions_activetcl = False
-    mentions_teapot = False
     # TCL/TK reads files using the system encoding:
     # https://www.tcl.tk/doc/howto/i18n.html#system_encoding
-    with open(init_resource, 'r', encoding=locale.getpreferredencoding()) as init_file:
-        for line in init_file.readlines():
-            line = line.strip().lower()
-            if line.startswith('#'):
-                continue
-            if 'activetcl' in line:
-                mentions_activetcl = True
-            if 'teapot' in line:
-                mentions_teapot = True
-            if mentions_activetcl and mentions_teapot:
-                break
+    with open(init_resource, 'r', encoding=locale.getpreferredencoding(False)) as init_file:
+        init_contents = init_file.read()
+
+    # Strip commented lines, then search the whole (lower-cased) script at once.
+    init_contents = _COMMENT_RE.sub('', init_contents).lower()
+    mentions_activetcl = 'activetcl' in init_contents
+    mentions_teapot = 'teapot' in init_contents
 
     if mentions_activetcl and mentions_teapot:
         logger.warning(
@@ -78,7 +85,122 @@ def _warn_if_activetcl_or_teapot_installed(tcl_root, tcltree):
         )
 
 
-def _find_tcl_tk_dir():
+def _query_tcl_tk():
+    """
+    Query the Tcl/Tk configuration of the host interpreter's tkinter. All values are obtained from a single
+    externally-spawned interpreter.
+
+    Returns
+    -------
+    tuple
+        3-tuple that contains the value of `${TCL_LIBRARY}`, the Tk version, and the Tcl version, respectively. If the
+        query fails, all three values are empty strings.
+    """
+    output = hookutils.exec_statement(
+        """
+        from tkinter import Tcl
+        from _tkinter import TK_VERSION
+        tcl = Tcl()
+        print(tcl.eval("info library"))
+        print(TK_VERSION)
+        print(tcl.eval("info tclversion"))
+        """
+    )
+    try:
+        tcl_root, tk_version, tcl_version = output.splitlines()
+    except ValueError:
+        return '', '', ''
+    return tcl_root, tk_version, tcl_version
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_tcl_tk(tkinter_ext_file):
+    """
+    Get the result of `_query_tcl_tk()` for the given _tkinter extension module. The result is cached for the duration
+    of the build, and is also persisted in PyInstaller's cache directory (in a file specific to the interpreter) so that
+    subsequent builds can skip the query. The persisted result is keyed by the paths and modification times of the
+    interpreter and the _tkinter extension (and, on macOS, the Tcl shared library), and by the values of the
+    `TCL_LIBRARY` and `TK_LIBRARY` environment variables. It is also discarded if the modification time of the Tcl data
+    directory changes, e.g., due to reinstallation of Tcl/Tk. The persistent cache is cleared by `--clean`.
+    """
+    cachedir = CONF.get('cachedir')
+    if not cachedir:
+        return _query_tcl_tk()
+
+    # The cache directory is shared by all interpreters of the user, so use a separate file for each of them.
+    executable_hash = hashlib.sha256(sys.executable.encode('utf-8'))
+    cache_file = os.path.join(cachedir, 'tcl_tk_probe_%s.dat' % executable_hash.hexdigest())
+
+    key_paths = [sys.executable, tkinter_ext_file]
+    if compat.is_darwin:
+        # On macOS, Tcl/Tk can be upgraded independently of _tkinter (e.g., Homebrew's tcl-tk), with the new version
+        # installed next to the old one. The linked Tcl library has already been looked up by `_find_tcl_tk()` at this
+        # point (and the lookup is cached), so keying on it is cheap. On other platforms, the lookup would require an
+        # extra `ldd` run or PE parse, so rely on the data directory check below instead.
+        key_paths.append(find_tcl_tk_shared_libs(tkinter_ext_file)[0][1])
+    cache_key = tuple((path, misc.mtime(path)) for path in key_paths)
+    # Tcl reports the data directory from the environment if set, so the environment is part of the configuration, too.
+    cache_key += (os.environ.get('TCL_LIBRARY'), os.environ.get('TK_LIBRARY'))
+
+    # Re-query if the cache is missing, stale or corrupted, or if the cached Tcl data directory has since been removed
+    # or modified.
+    try:
+        cache = misc.load_py_data_struct(cache_file)
+        if cache['key'] == cache_key and misc.mtime(cache['result'][0]) == cache['tcl_root_mtime']:
+            return cache['result']
+    except Exception:
+        pass
+
+    result = _query_tcl_tk()
+    tcl_root_mtime = misc.mtime(result[0])
+    if tcl_root_mtime:
+        try:
+            misc.save_py_data_struct(cache_file, {'key': cache_key, 'result': result, 'tcl_root_mtime': tcl_root_mtime})
+        except OSError:
+            logger.debug('Could not write Tcl/Tk configuration cache %s.', cache_file)
+    return result
+
+
+def _fast_tree(root, prefix=None, excludes=None):
+    """
+    Get a TOC of 3-tuples describing all data files found in the given directory.
+
+    This is a lightweight equivalent of :class:`PyInstaller.building.datastruct.Tree` with the same `prefix` and
+    `excludes` semantics. Excluded directories (e.g., `demos`) are pruned without being descended into, entry types are
+    obtained from :func:`os.scandir` instead of a separate `stat` call per file, and no build-time TOC file is written
+    into the work directory.
+    """
+    excludes = set(excludes or [])
+    xexcludes = {name[1:] for name in excludes if name.startswith('*')}
+
+    result = []
+    stack = [(root, prefix)]
+    while stack:
+        dirpath, prefix = stack.pop()
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                if entry.name in excludes or os.path.splitext(entry.name)[1] in xexcludes:
+                    continue
+                if prefix:
+                    resfilename = os.path.join(prefix, entry.name)
+                else:
+                    resfilename = entry.name
+                # Like `Tree`, follow symbolic links to directories.
+                if entry.is_dir():
+                    stack.append((entry.path, resfilename))
+                else:
+                    result.append((resfilename, entry.path, 'DATA'))
+
+    # The entries are unique by construction, so assign them at once instead of going through the per-entry checks of
+    # `TOC.append()`. Unlike `Tree.assemble()`, also record their unique names, so that the resulting TOC can be
+    # extended, subtracted and deduplicated against.
+    toc = TOC()
+    toc[:] = result
+    toc.filenames.update(unique_name(entry) for entry in result)
+    return toc
+
+
+def _find_tcl_tk_dir(tkinter_ext_file):
     """
     Get a platform-agnostic 2-tuple of the absolute paths of the top-level external data directories for both
     Tcl and Tk, respectively.
@@ -88,15 +210,22 @@ def _find_tcl_tk_dir():
     list
         2-tuple that contains the values of `${TCL_LIBRARY}` and `${TK_LIBRARY}`, respectively.
     """
-    # Python code to get path to TCL_LIBRARY.
-    tcl_root = hookutils.exec_statement('from tkinter import Tcl; print(Tcl().eval("info library"))')
-    tk_version = hookutils.exec_statement('from _tkinter import TK_VERSION; print(TK_VERSION)')
+    tcl_root, tk_version, _ = _probe_tcl_tk(tkinter_ext_file)
 
     # TK_LIBRARY is in the same prefix as Tcl.
     tk_root = os.path.join(os.path.dirname(tcl_root), 'tk%s' % tk_version)
     return tcl_root, tk_root
 
 
+@functools.lru_cache(maxsize=None)
+def _imports_for(tkinter_ext_file):
+    """
+    Get the shared libraries that the given _tkinter extension module is linked against, as a tuple. Parsing the binary
+    is moderately expensive and its result does not change during the build, so it is cached per extension file.
+    """
+    return tuple(bindepend.getImports(tkinter_ext_file))
+
+
 def find_tcl_tk_shared_libs(tkinter_ext_file):
     """
     Find Tcl and Tk shared libraries against which the _tkinter module is linked.
@@ -114,7 +243,7 @@ def find_tcl_tk_shared_libs(tkinter_ext_file):
     tk_libpath = None
 
     # Do not use bindepend.selectImports, as it ignores libraries seen during previous invocations.
-    _tkinter_imports = bindepend.getImports(tkinter_ext_file)
+    _tkinter_imports = _imports_for(tkinter_ext_file)
 
     def _get_library_path(lib):
         if not compat.is_win and not compat.is_cygwin:
@@ -156,54 +285,51 @@ def _find_tcl_tk(tkinter_ext_file):
         # python3 from XCode tools) or against bundled Tcl/Tk library (recent python.org builds, recent homebrew
         # python with python-tk). PyInstaller does not bundle data from system frameworks (as it does not not collect
         # shared libraries from them, either), so we need to determine what kind of Tcl/Tk we are dealing with.
-        libs = find_tcl_tk_shared_libs(tkinter_ext_file)
-
-        # Check the full path to the Tcl library.
-        path_to_tcl = libs[0][1]
+        # Check if _tkinter is linked against the system framework, i.e., [/System]/Library/Frameworks/Tcl.framework/Tcl
+        # This can be answered directly from the list of linked libraries, without classifying them first.
+        if any('Library/Frameworks/Tcl.framework' in lib for lib in _imports_for(tkinter_ext_file)):
+            return None, None  # Do not collect system framework's data.
 
         # Starting with macOS 11, system libraries are hidden (unless both Python and PyInstaller's bootloader are built
         # against MacOS 11.x SDK). Therefore, libs may end up empty; but that implicitly indicates that the system
         # framework is used, so return (None, None) to inform the caller.
+        libs = find_tcl_tk_shared_libs(tkinter_ext_file)
+        path_to_tcl = libs[0][1]
         if path_to_tcl is None:
             return None, None
 
-        # Check if the path corresponds to the system framework, i.e., [/System]/Library/Frameworks/Tcl.framework/Tcl
-        if 'Library/Frameworks/Tcl.framework' in path_to_tcl:
-            return None, None  # Do not collect system framework's data.
-
         # Bundled copy of Tcl/Tk; in this case, the dynamic library is
         # /Library/Frameworks/Python.framework/Versions/3.x/lib/libtcl8.6.dylib
         # and the data directories have standard layout that is handled by _find_tcl_tk_dir().
-        return _find_tcl_tk_dir()
+        return _find_tcl_tk_dir(tkinter_ext_file)
     else:
         # On Windows and linux, data directories have standard layout that is handled by _find_tcl_tk_dir().
-        return _find_tcl_tk_dir()
+        return _find_tcl_tk_dir(tkinter_ext_file)
 
 
-def _collect_tcl_modules(tcl_root):
+def _collect_tcl_modules(tcl_root, tkinter_ext_file):
     """
     Get a list of TOC-style 3-tuples describing Tcl modules. The modules directory is separate from the library/data
     one, and is located at $tcl_root/../tclX, where X is the major Tcl version.
 
     Returns
     -------
-    Tree
+    TOC
         Such list, if the modules directory exists.
     """
 
     # Obtain Tcl major version.
-    tcl_version = hookutils.exec_statement('from tkinter import Tcl; print(Tcl().eval("info tclversion"))')
-    tcl_version = tcl_version.split('.')[0]
+    tcl_version = _probe_tcl_tk(tkinter_ext_file)[2]
 
-    modules_dirname = 'tcl' + str(tcl_version)
-    modules_path = os.path.join(tcl_root, '..', modules_dirname)
+    modules_dirname = 'tcl' + tcl_version.split('.', 1)[0]
+    modules_path = os.path.normpath(os.path.join(os.path.dirname(tcl_root), modules_dirname))
 
-    if not os.path.isdir(modules_path):
+    try:
+        return _fast_tree(modules_path, prefix=modules_dirname)
+    except (FileNotFoundError, NotADirectoryError):
         logger.warning('Tcl modules directory %s does not exist.', modules_path)
         return []
 
-    return Tree(modules_path, prefix=modules_dirname)
-
 
 def collect_tcl_tk_files(tkinter_ext_file):
     """
@@ -211,7 +337,7 @@ def collect_tcl_tk_files(tkinter_ext_file):
 
     Returns
     -------
-    Tree
+    TOC
         Such list.
     """
     # Find Tcl and Tk data directory by analyzing the _tkinter extension.
@@ -232,22 +358,39 @@ def collect_tcl_tk_files(tkinter_ext_file):
     if not tcl_root:
         logger.error('Tcl/Tk improperly installed on this system.')
         return []
-    if not os.path.isdir(tcl_root):
-        logger.error('Tcl data directory "%s" not found.', tcl_root)
-        return []
-    if not os.path.isdir(tk_root):
-        logger.error('Tk data directory "%s" not found.', tk_root)
-        return []
 
-    tcltree = Tree(tcl_root, prefix='tcl', excludes=['demos', '*.lib', 'tclConfig.sh'])
-    tktree = Tree(tk_root, prefix='tk', excludes=['demos', '*.lib', 'tkConfig.sh'])
-
-    # If the current Tcl installation is a Teapot-distributed version of ActiveTcl and the current platform is Mac OS,
-    # warn that this is bad.
-    if compat.is_darwin:
-        _warn_if_activetcl_or_teapot_installed(tcl_root, tcltree)
-
-    # Collect Tcl modules.
-    tclmodulestree = _collect_tcl_modules(tcl_root)
-
-    return tcltree + tktree + tclmodulestree
+    # The directory walks are independent and I/O-bound, so run them concurrently. The existence of the data
+    # directories is not checked up-front; a missing directory makes the corresponding walk fail instead.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        tcltree_future = executor.submit(
+            _fast_tree, tcl_root, prefix='tcl', excludes=['demos', '*.lib', 'tclConfig.sh']
+        )
+        tktree_future = executor.submit(_fast_tree, tk_root, prefix='tk', excludes=['demos', '*.lib', 'tkConfig.sh'])
+
+        try:
+            tcltree = tcltree_future.result()
+        except (FileNotFoundError, NotADirectoryError):
+            logger.error('Tcl data directory "%s" not found.', tcl_root)
+            return []
+
+        try:
+            tktree = tktree_future.result()
+        except (FileNotFoundError, NotADirectoryError):
+            logger.error('Tk data directory "%s" not found.', tk_root)
+            return []
+
+        # Collect Tcl modules. This is submitted only once both data directories are known to exist, so that a missing
+        # installation is not additionally reported as a missing modules directory.
+        tclmodulestree_future = executor.submit(_collect_tcl_modules, tcl_root, tkinter_ext_file)
+
+        # If the current Tcl installation is a Teapot-distributed version of ActiveTcl and the current platform is Mac
+        # OS, warn that this is bad.
+        if compat.is_darwin:
+            _warn_if_activetcl_or_teapot_installed(tcl_root, tcltree)
+
+        tclmodulestree = tclmodulestree_future.result()
+
+    # Extend in place instead of chaining `+`, which would copy the (potentially large) TOC twice.
+    tcltree.extend(tktree)
+    tcltree.extend(tclmodulestree)
+    return tcltree
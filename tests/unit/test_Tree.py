@@ -17,6 +17,7 @@
 
 from os.path import join
 import PyInstaller.building.datastruct
+from PyInstaller.utils.hooks import tcl_tk
 
 
 class Tree(PyInstaller.building.datastruct.Tree):
@@ -68,3 +69,14 @@ def test_Tree(monkeypatch, prefix, excludes, result):
     tree = Tree(_DATA_BASEPATH, prefix=prefix, excludes=excludes)
     files = sorted(f[0] for f in tree)
     assert files == sorted(result)
+
+
+@pytest.mark.parametrize("prefix,excludes,result", _PARAMETERS)
+def test_fast_tree_matches_Tree(monkeypatch, prefix, excludes, result):
+    # The Tree equivalent used for collecting Tcl/Tk data must collect the same entries as the Tree class.
+    monkeypatch.setattr('PyInstaller.config.CONF', {'workpath': '.'})
+    tree = Tree(_DATA_BASEPATH, prefix=prefix, excludes=excludes)
+    fast_tree = tcl_tk._fast_tree(_DATA_BASEPATH, prefix=prefix, excludes=excludes)
+    assert sorted(fast_tree) == sorted(tree)
+    assert sorted(f[0] for f in fast_tree) == sorted(result)
+    assert len(fast_tree.filenames) == len(fast_tree)
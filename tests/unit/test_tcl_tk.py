@@ -0,0 +1,127 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2005-2021, PyInstaller Development Team.
+#
+# Distributed under the terms of the GNU General Public License (version 2
+# or later) with exception for distributing the bootloader.
+#
+# The full license is in the file COPYING.txt, distributed with this software.
+#
+# SPDX-License-Identifier: (GPL-2.0-or-later WITH Bootloader-exception)
+#-----------------------------------------------------------------------------
+
+# This contains tests for the helpers in PyInstaller.utils.hooks.tcl_tk.
+
+import os
+import pytest
+
+from PyInstaller.utils.hooks import tcl_tk
+
+
+def test_collect_tcl_tk_files_toc(monkeypatch):
+    # The collected files form a consistent TOC, i.e., all entries are recorded for deduplication and subtraction.
+    tcl_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tree_files')
+    tk_root = os.path.join(tcl_root, 'py_files_not_in_package')
+    monkeypatch.setattr(tcl_tk, '_find_tcl_tk', lambda filename: (tcl_root, tk_root))
+    monkeypatch.setattr(tcl_tk, '_collect_tcl_modules', lambda tcl_root, filename: [])
+    result = tcl_tk.collect_tcl_tk_files('_tkinter.so')
+    assert len(result) > 0
+    assert len(result.filenames) == len(result)
+    assert len(result - [('x', 'y', 'DATA')]) == len(result)
+
+
+@pytest.fixture
+def probe_env(monkeypatch, tmpdir):
+    # Fake _tkinter extension and Tcl data directory, and a query that counts its invocations.
+    tkinter_ext_file = tmpdir.join('_tkinter.so')
+    tkinter_ext_file.write('')
+    tcl_root = str(tmpdir.mkdir('tcl8.6'))
+    calls = []
+
+    def _query_tcl_tk():
+        calls.append(1)
+        return tcl_root, '8.6', '8.6'
+
+    monkeypatch.setattr(tcl_tk, '_query_tcl_tk', _query_tcl_tk)
+    monkeypatch.setattr(tcl_tk, '_imports_for', lambda filename: ())
+    monkeypatch.setitem(tcl_tk.CONF, 'cachedir', str(tmpdir.join('cache')))
+    tcl_tk._probe_tcl_tk.cache_clear()
+    yield tkinter_ext_file, tcl_root, calls
+    tcl_tk._probe_tcl_tk.cache_clear()
+
+
+def _probe(tkinter_ext_file):
+    # Simulate a new build by clearing the in-memory cache first.
+    tcl_tk._probe_tcl_tk.cache_clear()
+    return tcl_tk._probe_tcl_tk(str(tkinter_ext_file))
+
+
+def test_probe_tcl_tk_persistent_cache(probe_env):
+    # The result of the Tcl/Tk query is persisted in the cache directory and reused by subsequent builds.
+    tkinter_ext_file, tcl_root, calls = probe_env
+    for _ in range(2):
+        assert _probe(tkinter_ext_file) == (tcl_root, '8.6', '8.6')
+    assert len(calls) == 1
+
+
+def test_probe_tcl_tk_persistent_cache_invalidation(probe_env):
+    # Reinstalling tkinter (here: touching the _tkinter extension) invalidates the persisted result.
+    tkinter_ext_file, tcl_root, calls = probe_env
+    _probe(tkinter_ext_file)
+    mtime = os.path.getmtime(str(tkinter_ext_file))
+    os.utime(str(tkinter_ext_file), (mtime + 10, mtime + 10))
+    _probe(tkinter_ext_file)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("envvar", ['TCL_LIBRARY', 'TK_LIBRARY'])
+def test_probe_tcl_tk_persistent_cache_environment(probe_env, monkeypatch, envvar):
+    # Tcl honours TCL_LIBRARY (and Tk TK_LIBRARY), so changing them invalidates the persisted result.
+    tkinter_ext_file, tcl_root, calls = probe_env
+    monkeypatch.delenv('TCL_LIBRARY', raising=False)
+    monkeypatch.delenv('TK_LIBRARY', raising=False)
+    _probe(tkinter_ext_file)
+    monkeypatch.setenv(envvar, '/tmp/fake_tcl')
+    _probe(tkinter_ext_file)
+    _probe(tkinter_ext_file)
+    assert len(calls) == 2
+
+
+def test_probe_tcl_tk_persistent_cache_tcl_root_modified(probe_env):
+    # Reinstalling Tcl/Tk in place (here: touching the Tcl data directory) invalidates the persisted result.
+    tkinter_ext_file, tcl_root, calls = probe_env
+    _probe(tkinter_ext_file)
+    mtime = os.path.getmtime(tcl_root)
+    os.utime(tcl_root, (mtime + 10, mtime + 10))
+    _probe(tkinter_ext_file)
+    _probe(tkinter_ext_file)
+    assert len(calls) == 2
+
+
+def test_probe_tcl_tk_persistent_cache_per_interpreter(probe_env, monkeypatch):
+    # Alternating between interpreters does not evict each other's persisted results.
+    tkinter_ext_file, tcl_root, calls = probe_env
+    for executable in ['/fake/python1', '/fake/python2'] * 2:
+        monkeypatch.setattr('sys.executable', executable)
+        _probe(tkinter_ext_file)
+    assert len(calls) == 2
+
+
+def test_probe_tcl_tk_no_library_lookup(probe_env, monkeypatch):
+    # Outside of macOS, building the cache key must not look up the linked Tcl library.
+    tkinter_ext_file, tcl_root, calls = probe_env
+
+    def _imports_for(filename):
+        raise AssertionError("Unexpected library lookup")
+
+    monkeypatch.setattr(tcl_tk.compat, 'is_darwin', False)
+    monkeypatch.setattr(tcl_tk, '_imports_for', _imports_for)
+    _probe(tkinter_ext_file)
+
+
+def test_probe_tcl_tk_unwritable_cache(probe_env, monkeypatch, tmpdir):
+    # Failure to write the cache must not break the build.
+    tkinter_ext_file, tcl_root, calls = probe_env
+    cachedir = tmpdir.join('not-a-dir')
+    cachedir.write('')
+    monkeypatch.setitem(tcl_tk.CONF, 'cachedir', str(cachedir))
+    assert _probe(tkinter_ext_file) == (tcl_root, '8.6', '8.6')